@@ -1,171 +1,360 @@
+import inspect
+import io
+import logging
+import os
+import re
 import unittest
-from unittest.mock import patch, MagicMock, ANY
+from contextlib import ExitStack
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import patch, create_autospec, Mock, ANY
 
 # The class under test is in shokobridge/bridge.py
 from shokobridge.bridge import ShokoBridge
-
-class TestShokoBridge(unittest.TestCase):
-
-    # Patch dependencies where they are used: in 'shokobridge.bridge'
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    # Patch the static method for cleaning filenames
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    # Patch the WSL host IP check as it's an external call
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    # Patch the directory existence check to prevent early exit
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_add_update_single_tv_show_file(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                                mock_db_manager, mock_file_manager,
-                                                mock_shoko_client, mock_tmdb_client):
-        """
-        Test a standard run with one new TV show file to process successfully.
+from shokobridge.clients.shoko import ShokoClient
+from shokobridge.clients.tmdb import TMDbClient
+from shokobridge.database import DatabaseManager
+from shokobridge.file_manager import FileManager
+
+# --- API payload builders ---
+# These mirror the Shoko and TMDb response structures consumed by bridge.py,
+# so each test only spells out the fields it actually cares about.
+
+def _file_details(relative_path, show_id=999, episode_id=456):
+    """Builds a Shoko file payload linked to one episode and, unless show_id is None, one TMDb show."""
+    series_ids = {'EpisodeIDs': [{'ID': episode_id}]}
+    if show_id is not None:
+        series_ids['SeriesID'] = {'TMDB': {'Show': [show_id]}}
+    return {'Locations': [{'RelativePath': relative_path}], 'SeriesIDs': [series_ids]}
+
+def _episode_details(name, anidb_type='Normal', tmdb_ids=None, tmdb=None):
+    """Builds a Shoko episode payload. 'tmdb_ids' fills IDs.TMDB; 'tmdb' is the optional TMDB data section."""
+    details = {'Name': name, 'AniDB': {'Type': anidb_type}, 'IDs': {'TMDB': tmdb_ids or {}}}
+    if tmdb is not None:
+        details['TMDB'] = tmdb
+    return details
+
+def _linked_tv_episode(title, season_number, episode_number, tmdb_id=789):
+    """Builds a Shoko episode payload that already carries the full TMDb episode data."""
+    return _episode_details(title, tmdb_ids={'Episode': [tmdb_id]}, tmdb={'Episodes': [{
+        'ID': tmdb_id, 'Title': title, 'SeasonNumber': season_number, 'EpisodeNumber': episode_number
+    }]})
+
+def _linked_movie(title, released_at, tmdb_id=98765):
+    """Builds a Shoko episode payload for a movie that already carries the full TMDb movie data."""
+    return _episode_details('Movie Title', 'Movie', tmdb_ids={'Movie': [tmdb_id]}, tmdb={'Movies': [{
+        'ID': tmdb_id, 'Title': title, 'ReleasedAt': released_at
+    }]})
+
+def _series_details(name='Series Title', first_air_date='2023-01-01', seasons=None):
+    """Builds a TMDb series payload, with a 'seasons' list only when one is given."""
+    details = {'name': name, 'first_air_date': first_air_date}
+    if seasons is not None:
+        details['seasons'] = seasons
+    return details
+
+def _freeze(payload):
+    """Returns a read-only copy of an API payload: dicts become MappingProxyType and lists tuples."""
+    if isinstance(payload, dict):
+        return MappingProxyType({key: _freeze(value) for key, value in payload.items()})
+    if isinstance(payload, list):
+        return tuple(_freeze(value) for value in payload)
+    return payload
+
+# Side-effect sequences for the error-handling runs, built once and shared read-only:
+# the first file of each run fails and the second one is linked. The Shoko failure is
+# raised by a fresh exception per run, so only the payload that follows it is shared.
+_SHOKO_DOWN_LINKED_FILE_DETAILS = _freeze(_file_details('series/episode.mkv'))
+_SHOKO_DOWN_EPISODE_DETAILS = (_freeze(_linked_tv_episode('Episode Title', 1, 1)),)
+_SHOKO_DOWN_SERIES_DETAILS = (_freeze(_series_details()),)
+_TMDB_DOWN_FILE_DETAILS = (
+    _freeze(_file_details('series/failed_ep.mkv', show_id=888)),
+    _freeze(_file_details('series/success_ep.mkv', episode_id=789)),
+)
+_TMDB_DOWN_EPISODE_DETAILS = (
+    _freeze(_episode_details('Failed Episode')),
+    _freeze(_linked_tv_episode('Successful Episode', 1, 2, tmdb_id=12345)),
+)
+_TMDB_DOWN_SERIES_DETAILS = (None, _freeze(_series_details('Successful Series', '2024-01-01')))
+
+def _stub_returns(instance_mock, **return_values):
+    """Sets the return value of each named method of 'instance_mock' in a single configure_mock() call."""
+    instance_mock.configure_mock(**{f'{method}.return_value': value for method, value in return_values.items()})
+
+# A complete mock config, reflecting the structure of config.json
+# plus the 'paths' key injected by the main script. The bridge only reads
+# its config, so it is frozen all the way down and shared by every test.
+_BASE_CONFIG = MappingProxyType({
+    'directories': MappingProxyType({
+        'source_root': '/source',
+        'destination': '/dest/shows',
+    }),
+    'shoko': MappingProxyType({'url': 'http://test.host:8111', 'api_key': 'test_key'}),
+    'tmdb': MappingProxyType({'api_key': 'test_key'}),
+    'path_mappings': (),
+    'options': MappingProxyType({
+        'title_similarity_threshold': 0.85,
+        'link_type': 'symlink', 'use_relative_symlinks': False
+    }),
+    'paths': MappingProxyType({
+        'db': 'test.db',
+        'cache': 'cache.json',
+        'unmatched_report': 'report.txt'
+    })
+})
+
+# The (source, destination) paths the bridge should hand to FileManager, per scenario.
+_EXPECTED = MappingProxyType({
+    'tv_episode': (
+        '/source/series/episode.mkv',
+        '/dest/shows/Series Title (2023)/Season 01/Series Title (2023) - S01E01 - Episode Title.mkv',
+    ),
+    'movie': (
+        '/source/movies/movie.mkv',
+        '/dest/movies/Movie Title from TMDb (2024)/Movie Title from TMDb (2024).mkv',
+    ),
+    # Without 'destination_movies', movies go to the main destination
+    'movie_main_destination': (
+        '/source/movies/movie.mkv',
+        '/dest/media/Movie Title from TMDb (2024)/Movie Title from TMDb (2024).mkv',
+    ),
+    'title_fallback': (
+        '/source/series/fallback_ep.mkv',
+        '/dest/shows/Series Title (2023)/Season 01/Series Title (2023) - S01E05 - The Great Fallback Episode.mkv',
+    ),
+    'movie_api_fallback': (
+        '/source/movies/movie_fallback.mkv',
+        '/dest/movies/Movie Title from API (2025)/Movie Title from API (2025).mkv',
+    ),
+    'tv_api_fallback': (
+        '/source/series/tv_fallback.mkv',
+        '/dest/shows/Series Title (2023)/Season 01/Series Title (2023) - S01E05 - Episode from API.mkv',
+    ),
+    'supplemental': (
+        '/source/One Piece/One Piece - 1107 [9A4CD29B].mkv',
+        '/dest/shows/One Piece (1999)/Season 22/One Piece (1999) - S22E1107 - A Shudder! The Evil Hand Creeping Up on the Laboratory.mkv',
+    ),
+    'tmdb_error_recovery': (
+        '/source/series/success_ep.mkv',
+        '/dest/shows/Successful Series (2024)/Season 01/Successful Series (2024) - S01E02 - Successful Episode.mkv',
+    ),
+})
+
+# The parsed command-line arguments of a plain add/update run.
+_BASE_ARGS = MappingProxyType({'cleanup': False, 'dry_run': False, 'debug': False})
+
+def _args(**overrides):
+    """Returns the parsed arguments for a run, with the given flags overridden."""
+    return SimpleNamespace(**{**_BASE_ARGS, **overrides})
+
+def _config(**directories):
+    """
+    Returns the config for a test: the shared base config, or, with 'directories' overrides,
+    a frozen variant that shares every other section with it.
+    """
+    if not directories:
+        return _BASE_CONFIG
+    return MappingProxyType({**_BASE_CONFIG, 'directories': MappingProxyType({**_BASE_CONFIG['directories'], **directories})})
+
+# The bridge logs through the root logger, so its records are told apart by source file
+_BRIDGE_SOURCE = os.path.abspath(inspect.getfile(ShokoBridge))
+
+def _from_bridge(record):
+    """Log filter keeping only the records emitted by shokobridge/bridge.py."""
+    return os.path.abspath(record.pathname) == _BRIDGE_SOURCE
+
+class _ListHandler(logging.Handler):
+    """
+    Collects the bridge's records as-is. Messages are only %-formatted when a test reads
+    them through _logged(), and only for the levels it asks for.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.addFilter(_from_bridge)
+
+    def emit(self, record):
+        self.records.append(record)
+
+class _ReportFile(io.StringIO):
+    """An in-memory report file whose contents stay readable after the bridge closes it."""
+
+    def close(self):
+        pass
+
+    def lines(self):
+        """Returns the written lines, each with its trailing newline."""
+        return self.getvalue().splitlines(keepends=True)
+
+class _BridgeTestCase(unittest.TestCase):
+    """Shared collaborator mocks and patch helpers for the ShokoBridge test classes."""
+
+    # Environment stand-ins every test needs besides the collaborator classes: (target, replacement).
+    # No test records or asserts their calls, so they are plain functions swapped in once per class.
+    _CLASS_PATCHES = (
+        # Replace the static method for cleaning filenames with a plain identity function
+        ('shokobridge.bridge.ShokoBridge._clean_filename', staticmethod(lambda x: x)),
+        # Patch the WSL host IP check as it's an external call
+        ('shokobridge.bridge.get_windows_host_ip', lambda: '127.0.0.1'),
+        # Patch the directory existence check to prevent early exit
+        ('shokobridge.bridge.os.path.isdir', lambda path: True),
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        """Build the client and manager instance mocks, and the class-wide patches, once for the whole class."""
+        # Autospecced instances: the clients and managers are only driven through their public
+        # methods, so nothing beyond the class's own attributes may be read or assigned, and
+        # each call is checked against the real method signature. create_autospec builds these
+        # on MagicMock; the signature checks are worth more than dropping its magic methods.
+        cls._tmdb_client = create_autospec(TMDbClient, instance=True, spec_set=True)
+        cls._shoko_client = create_autospec(ShokoClient, instance=True, spec_set=True)
+        cls._file_manager = create_autospec(FileManager, instance=True, spec_set=True)
+        cls._db_manager = create_autospec(DatabaseManager, instance=True, spec_set=True)
+        cls._instance_mocks = (cls._tmdb_client, cls._shoko_client, cls._file_manager, cls._db_manager)
+        # Stands in for the unmatched-report 'open'; each test gets a fresh in-memory file from it
+        cls._report_open = Mock()
+
+        # Patch the bridge's dependencies where they are used, in 'shokobridge.bridge', once for
+        # the whole class: each collaborator class hands out its shared instance mock.
+        class_patches = ExitStack()
+        cls.addClassCleanup(class_patches.close)
+        class_patches.enter_context(patch.multiple(
+            'shokobridge.bridge',
+            TMDbClient=Mock(return_value=cls._tmdb_client),
+            ShokoClient=Mock(return_value=cls._shoko_client),
+            FileManager=Mock(return_value=cls._file_manager),
+            DatabaseManager=Mock(return_value=cls._db_manager),
+        ))
+        # Patch the report file 'open' so no test writes to disk
+        class_patches.enter_context(patch('shokobridge.bridge.open', new=cls._report_open))
+        for target, replacement in cls._CLASS_PATCHES:
+            class_patches.enter_context(patch(target, new=replacement))
+
+    def setUp(self):
+        """Capture the bridge's logs and hand the test cleared shared mocks."""
+        # The bridge logs through the root logger; capture INFO and above for the test. The
+        # capture handler replaces the root handlers for the test, as assertLogs does, so
+        # nothing reaches a console handler installed by an earlier logging call.
+        self._log = _ListHandler()
+        root_logger = logging.getLogger()
+        self.addCleanup(setattr, root_logger, 'handlers', root_logger.handlers)
+        self.addCleanup(setattr, root_logger, 'propagate', root_logger.propagate)
+        self.addCleanup(root_logger.setLevel, root_logger.level)
+        root_logger.handlers = [self._log]
+        root_logger.setLevel(logging.INFO)
+        self._reset_mocks()
+
+    def _reset_mocks(self):
+        """
+        Clears calls, return values and side effects left on the class-level instance mocks,
+        and the captured logs and report.
+        """
+        for instance_mock in self._instance_mocks:
+            instance_mock.reset_mock(return_value=True, side_effect=True)
+        self._report_open.reset_mock()
+        self._report = _ReportFile()
+        self._report_open.return_value = self._report
+        self._log.records.clear()
+
+    def _stub_new_files(self, *file_ids):
+        """Stubs a reachable Shoko server holding 'file_ids', none of which have been processed yet."""
+        self._db_manager.get_processed_file_ids.return_value = set()
+        _stub_returns(self._shoko_client, get_all_file_ids=list(file_ids), check_connection=True)
+
+    def _logged(self, level):
+        """Returns the messages captured at or above 'level', in the order they were logged."""
+        return [record.getMessage() for record in self._log.records if record.levelno >= level]
+
+    def _assert_logged_in_order(self, level, *substrings, skip=0):
+        """
+        Asserts that the messages captured at or above 'level', after the first 'skip',
+        contain 'substrings' one per message, in order. A single anchored regex checks them all.
+        """
+        pattern = r'\A' + r'(?:.*\n)' * skip + '\n'.join(f'.*{re.escape(substring)}.*' for substring in substrings)
+        self.assertRegex('\n'.join(self._logged(level)), pattern)
+
+class TestShokoBridge(_BridgeTestCase):
+    """Add/update runs that end with a file being linked."""
+
+    def test_run_add_update_single_tv_show_file(self):
+        """
+        Test a standard run with one new TV show file, once normally and once in dry-run
+        mode, where the file is still processed but no database write is made.
         """
-        # --- Arrange ---
-        # Mock arguments to simulate a standard run
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        # A more complete mock config, reflecting the structure of config.json
-        # plus the 'paths' key injected by the main script.
-        mock_config = {
-            'directories': {
-                'source_root': '/source',
-                'destination': '/dest/shows',
-            },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': {
-                'title_similarity_threshold': 0.85,
-                'link_type': 'symlink', 'use_relative_symlinks': False
-            },
-            'paths': {
-                'db': 'test.db',
-                'cache': 'cache.json',
-                'unmatched_report': 'report.txt'
-            }
-        }
-
         # Get mock instances of the clients and managers
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        # Simulate no files processed yet
-        db_manager.get_processed_file_ids.return_value = set()
-        # Shoko has one file
-        shoko_client.get_all_file_ids.return_value = [123]
-        # Simulate successful connection
-        shoko_client.check_connection.return_value = True
-
-        # Mock API responses based on the structure used in bridge.py
-        shoko_client.get_file_details.return_value = {
-            'Locations': [{'RelativePath': 'series/episode.mkv'}],
-            'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [999]}}, 'EpisodeIDs': [{'ID': 456}]}]
-        }
-        shoko_client.get_episode_details.return_value = {
-            'Name': 'Episode Title',
-            'AniDB': {'Type': 'Normal'},
-            'IDs': {'TMDB': {'Episode': [789]}},
-            'TMDB': {'Episodes': [{
-                'ID': 789,
-                'Title': 'Episode Title',
-                'SeasonNumber': 1,
-                'EpisodeNumber': 1
-            }]}
-        }
-        tmdb_client.get_series_details.return_value = {
-            'name': 'Series Title',
-            'first_air_date': '2023-01-01'
-        }
-        # Simulate successful file processing
-        file_manager.process_file_group.return_value = True
-
-        # --- Act ---
-        # Instantiate the bridge with our mock objects
-        bridge = ShokoBridge(mock_args, mock_config)
-        # The run method will use the mocked components
-        bridge.run()
-
-        # --- Assert ---
-        # Verify the main sequence of events
-        shoko_client.check_connection.assert_called_once()
-        db_manager.get_processed_file_ids.assert_called_once()
-        shoko_client.get_all_file_ids.assert_called_once()
-        shoko_client.get_file_details.assert_called_once_with(123)
-        shoko_client.get_episode_details.assert_called_once_with(456)
-        tmdb_client.get_series_details.assert_called_once_with(999)
-
-        # Verify the path construction and file processing calls
-        expected_dest_path = '/dest/shows/Series Title (2023)/Season 01/Series Title (2023) - S01E01 - Episode Title.mkv'
-        file_manager.process_file_group.assert_called_once_with('/source/series/episode.mkv', expected_dest_path, ANY)
-        db_manager.add_processed_file.assert_called_once_with(123, expected_dest_path)
-
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_add_update_single_movie_file(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                               mock_db_manager, mock_file_manager,
-                                               mock_shoko_client, mock_tmdb_client):
+        db_manager = self._db_manager
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
+        tmdb_client = self._tmdb_client
+
+        for dry_run in (False, True):
+            with self.subTest(dry_run=dry_run):
+                # --- Arrange ---
+                self._reset_mocks()
+                mock_args = _args(dry_run=dry_run)
+                mock_config = _config()
+
+                # Shoko is reachable and has one file that has not been processed yet
+                self._stub_new_files(123)
+
+                # Mock API responses based on the structure used in bridge.py
+                _stub_returns(
+                    shoko_client,
+                    get_file_details=_file_details('series/episode.mkv'),
+                    get_episode_details=_linked_tv_episode('Episode Title', 1, 1),
+                )
+                tmdb_client.get_series_details.return_value = _series_details()
+                # Simulate successful file processing
+                file_manager.process_file_group.return_value = True
+
+                # --- Act ---
+                bridge = ShokoBridge(mock_args, mock_config)
+                bridge.run()
+                if dry_run:
+                    self.assertIn("DRY RUN MODE ENABLED: No changes will be made", self._logged(logging.WARNING)[0])
+
+                # --- Assert ---
+                # Verify the main sequence of events
+                shoko_client.check_connection.assert_called_once()
+                db_manager.get_processed_file_ids.assert_called_once()
+                shoko_client.get_all_file_ids.assert_called_once()
+                shoko_client.get_file_details.assert_called_once_with(123)
+                shoko_client.get_episode_details.assert_called_once_with(456)
+                tmdb_client.get_series_details.assert_called_once_with(999)
+
+                # Verify the path construction and file processing calls
+                # (FileManager handles the dry run itself, so it is called either way)
+                source, destination = _EXPECTED['tv_episode']
+                file_manager.process_file_group.assert_called_once_with(source, destination, ANY)
+                if dry_run:
+                    db_manager.add_processed_file.assert_not_called()
+                else:
+                    db_manager.add_processed_file.assert_called_once_with(123, destination)
+
+    def test_run_add_update_single_movie_file(self):
         """
         Test a standard run with one new movie file to process successfully.
         """
         # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
+        mock_args = _args()
 
         # Mock config with a separate movie destination
-        mock_config = {
-            'directories': {
-                'source_root': '/source',
-                'destination': '/dest/shows',
-                'destination_movies': '/dest/movies'
-            },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': {
-                'title_similarity_threshold': 0.85,
-                'link_type': 'symlink', 'use_relative_symlinks': False
-            },
-            'paths': {
-                'db': 'test.db',
-                'cache': 'cache.json',
-                'unmatched_report': 'report.txt'
-            }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
+        mock_config = _config(destination_movies='/dest/movies')
+
+        db_manager = self._db_manager
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
+        tmdb_client = self._tmdb_client
+
+        self._stub_new_files(123)
 
         # Mock API responses for a MOVIE
-        shoko_client.get_file_details.return_value = {
-            'Locations': [{'RelativePath': 'movies/movie.mkv'}],
-            'SeriesIDs': [{'EpisodeIDs': [{'ID': 456}]}]
-        }
-        shoko_client.get_episode_details.return_value = {
-            'Name': 'Movie Title', 'AniDB': {'Type': 'Movie'},
-            'IDs': {'TMDB': {'Movie': [98765]}},
-            'TMDB': {'Movies': [{'ID': 98765, 'Title': 'Movie Title from TMDb', 'ReleasedAt': '2024-01-01'}]}
-        }
+        _stub_returns(
+            shoko_client,
+            get_file_details=_file_details('movies/movie.mkv', show_id=None),
+            get_episode_details=_linked_movie('Movie Title from TMDb', '2024-01-01'),
+        )
         file_manager.process_file_group.return_value = True
 
         # --- Act ---
@@ -176,357 +365,215 @@ class TestShokoBridge(unittest.TestCase):
         tmdb_client.get_series_details.assert_not_called()
         tmdb_client.get_movie_details.assert_not_called()
 
-        expected_dest_path = '/dest/movies/Movie Title from TMDb (2024)/Movie Title from TMDb (2024).mkv'
-        file_manager.process_file_group.assert_called_once_with('/source/movies/movie.mkv', expected_dest_path, ANY)
-        db_manager.add_processed_file.assert_called_once_with(123, expected_dest_path)
-
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_cleanup_stale_files(self, mock_isdir, mock_get_ip,
-                                     mock_db_manager, mock_file_manager,
-                                     mock_shoko_client, mock_tmdb_client):
+        source, destination = _EXPECTED['movie']
+        file_manager.process_file_group.assert_called_once_with(source, destination, ANY)
+        db_manager.add_processed_file.assert_called_once_with(123, destination)
+
+    def test_run_extra_files(self):
         """
-        Test a cleanup run where one stale file is found and removed.
+        Test runs with files identified as extras, one subtest per AniDB type.
         """
-        # --- Arrange ---
-        # Mock arguments to simulate a cleanup run
-        mock_args = MagicMock()
-        mock_args.cleanup = True
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        # Mock config
-        mock_config = {
-            'directories': {
-                'source_root': '/source',
-                'destination': '/dest/shows',
-                'destination_movies': '/dest/movies'
-            },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': {
-                'link_type': 'symlink',
-                'use_relative_symlinks': False
-            },
-            'paths': {
-                'db': 'test.db',
-                'cache': 'cache.json',
-                'unmatched_report': 'report.txt'
-            }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-
-        # Shoko has no files, but our DB has one, making it stale.
-        shoko_client.get_all_file_ids.return_value = []
-        db_manager.get_stale_entries.return_value = [
-            {'shoko_file_id': 999, 'destination_path': '/dest/shows/Stale Show/S01/stale.mkv'}
+        # (AniDB type, file name, Shoko episode title, expected extras folder)
+        extras = [
+            ('Special', 'special.mkv', 'My Awesome Special', 'Featurettes'),
+            ('Trailer', 'trailer.mkv', 'Awesome Trailer', 'Trailers'),
+            ('Other', 'other_extra.mkv', 'My Other Extra', 'Other'),
         ]
-        shoko_client.check_connection.return_value = True
-
-        # --- Act ---
-        bridge = ShokoBridge(mock_args, mock_config)
-        bridge.run()
-
-        # --- Assert ---
-        shoko_client.check_connection.assert_called_once()
-        db_manager.get_stale_entries.assert_called_once_with([])
-        file_manager.cleanup_stale_files.assert_called_once_with('/dest/shows/Stale Show/S01/stale.mkv')
-        db_manager.remove_stale_entry.assert_called_once_with(999)
-        file_manager.cleanup_empty_dirs.assert_any_call('/dest/shows')
-        file_manager.cleanup_empty_dirs.assert_any_call('/dest/movies')
-        self.assertEqual(file_manager.cleanup_empty_dirs.call_count, 2)
-
-    @patch('shokobridge.bridge.open', new_callable=unittest.mock.mock_open)
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_unmatched_file(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                mock_db_manager, mock_file_manager,
-                                mock_shoko_client, mock_tmdb_client, mock_open):
+        mock_args = _args()
+        mock_config = _config()
+
+        db_manager = self._db_manager
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
+        tmdb_client = self._tmdb_client
+
+        for anidb_type, file_name, episode_title, extras_folder in extras:
+            with self.subTest(anidb_type=anidb_type):
+                # --- Arrange ---
+                self._reset_mocks()
+                self._stub_new_files(123)
+
+                # No TMDb episode ID, so the AniDB type decides the extras folder
+                _stub_returns(
+                    shoko_client,
+                    get_file_details=_file_details(f'series/{file_name}'),
+                    get_episode_details=_episode_details(episode_title, anidb_type),
+                )
+                tmdb_client.get_series_details.return_value = _series_details(seasons=[])
+                file_manager.process_file_group.return_value = True
+
+                # --- Act ---
+                bridge = ShokoBridge(mock_args, mock_config)
+                bridge.run()
+
+                # --- Assert ---
+                expected_dest_path = f'/dest/shows/Series Title (2023)/{extras_folder}/{episode_title}.mkv'
+                file_manager.process_file_group.assert_called_once_with(f'/source/series/{file_name}', expected_dest_path, ANY)
+                db_manager.add_processed_file.assert_called_once_with(123, expected_dest_path)
+
+    def test_run_skip_processed_file(self):
         """
-        Test a run where a file cannot be matched and is added to the report.
+        Test a run where a file is already in the database and should be skipped.
         """
         # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': {
-                'source_root': '/source',
-                'destination': '/dest/shows',
-            },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': {
-                'title_similarity_threshold': 0.85,
-                'link_type': 'symlink', 'use_relative_symlinks': False
-            },
-            'paths': {
-                'db': 'test.db',
-                'cache': 'cache.json',
-                'unmatched_report': 'report.txt'
-            }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
+        mock_args = _args()
+
+        mock_config = _config()
+
+        db_manager = self._db_manager
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
+
+        # Simulate the file ID is already in the database
         shoko_client.get_all_file_ids.return_value = [123]
+        db_manager.get_processed_file_ids.return_value = {123}
         shoko_client.check_connection.return_value = True
 
-        # Mock API responses for a file that CANNOT be matched
-        shoko_client.get_file_details.return_value = {
-            'Locations': [{'RelativePath': 'series/unmatched_episode.mkv'}],
-            'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [999]}}, 'EpisodeIDs': [{'ID': 456}]}]
-        }
-        # No TMDb episode ID, forcing a title match which will fail
-        shoko_client.get_episode_details.return_value = {
-            'Name': 'A Very Unique Title That Will Not Match', 'AniDB': {'Type': 'Normal'}, 'IDs': {'TMDB': {}}
-        }
-        tmdb_client.get_series_details.return_value = {'name': 'Series Title', 'first_air_date': '2023-01-01', 'seasons': []}
-
-        # --- Act & Assert Logs ---
-        # Use assertLogs to capture and verify the expected warning messages,
-        # which also prevents them from printing to the console during tests.
-        with self.assertLogs('root', level='WARNING') as cm:
-            bridge = ShokoBridge(mock_args, mock_config)
-            bridge.run()
-            self.assertIn("No TMDb Episode ID link found for a 'Normal' episode", cm.output[0])
-            self.assertIn("Could not determine destination path or filename", cm.output[1])
+        # --- Act ---
+        bridge = ShokoBridge(mock_args, mock_config)
+        bridge.run()
 
         # --- Assert ---
-        # Verify that the file was not processed or added to the DB
+        # Verify that no processing calls were made for the file
+        shoko_client.get_file_details.assert_not_called()
         file_manager.process_file_group.assert_not_called()
         db_manager.add_processed_file.assert_not_called()
 
-        # Verify that the unmatched report was written to
-        mock_open.assert_called_once_with('report.txt', 'w', encoding='utf-8')
-        handle = mock_open()
-        handle.write.assert_any_call("File: 'unmatched_episode.mkv' | ID: 123 | Reason: Could not determine destination path or filename. Skipping.\n")
-
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_extra_file_special(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                     mock_db_manager, mock_file_manager,
-                                     mock_shoko_client, mock_tmdb_client):
+    def test_run_file_with_no_tmdb_episode_id_fallback_success(self):
         """
-        Test a run with a file identified as a 'Special' extra.
+        Test a run where an episode has no TMDb ID, but successfully matches by title.
         """
         # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
+        mock_args = _args()
+
+        mock_config = _config()
+
+        db_manager = self._db_manager
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
+        tmdb_client = self._tmdb_client
 
-        # Mock API responses for a file that is a SPECIAL
-        shoko_client.get_file_details.return_value = {
-            'Locations': [{'RelativePath': 'series/special.mkv'}],
-            'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [999]}}, 'EpisodeIDs': [{'ID': 456}]}]
-        }
-        # No TMDb episode ID, but AniDB type is 'Special'
-        shoko_client.get_episode_details.return_value = { 'Name': 'My Awesome Special', 'AniDB': {'Type': 'Special'}, 'IDs': {'TMDB': {}} }
-        tmdb_client.get_series_details.return_value = { 'name': 'Series Title', 'first_air_date': '2023-01-01', 'seasons': [] }
+        self._stub_new_files(123)
+
+        # Mock API responses for a file with no TMDb Episode ID
+        _stub_returns(
+            shoko_client,
+            get_file_details=_file_details('series/fallback_ep.mkv'),
+            get_episode_details=_episode_details('The Great Fallback Episode'),
+        )
+        _stub_returns(
+            tmdb_client,
+            get_series_details=_series_details(seasons=[{'season_number': 1, 'name': 'Season 1'}]),
+            get_season_details=[ {'id': 789, 'name': 'The Great Fallback Episode', 'season_number': 1, 'episode_number': 5} ],
+        )
         file_manager.process_file_group.return_value = True
 
-        # --- Act ---
+        # --- Act & Assert Logs ---
         bridge = ShokoBridge(mock_args, mock_config)
         bridge.run()
+        # Skipped: "--- Starting ADD/UPDATE Run ---" and "Found 1 new files to process."
+        self._assert_logged_in_order(
+            logging.INFO,
+            "No TMDb Episode ID link found for a 'Normal' episode. Attempting fallback match by title...",
+            "SUCCESS (Fallback Match): Matched to S1E5 with similarity 1.00!",
+            skip=2,
+        )
 
         # --- Assert ---
-        # Verify the path construction for an extra placed in the 'Featurettes' folder
-        expected_dest_path = '/dest/shows/Series Title (2023)/Featurettes/My Awesome Special.mkv'
-        file_manager.process_file_group.assert_called_once_with('/source/series/special.mkv', expected_dest_path, ANY)
-        db_manager.add_processed_file.assert_called_once_with(123, expected_dest_path)
-
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_cleanup_dry_run(self, mock_isdir, mock_get_ip,
-                                 mock_db_manager, mock_file_manager,
-                                 mock_shoko_client, mock_tmdb_client):
-        """
-        Test a cleanup run in dry-run mode to ensure no destructive actions are taken.
-        """
-        # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = True
-        mock_args.dry_run = True
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': {
-                'source_root': '/source',
-                'destination': '/dest/shows',
-                'destination_movies': '/dest/movies'
+        tmdb_client.get_season_details.assert_called_once_with(999, 1)
+        source, destination = _EXPECTED['title_fallback']
+        file_manager.process_file_group.assert_called_once_with(source, destination, ANY)
+        db_manager.add_processed_file.assert_called_once_with(123, destination)
+
+    def test_run_tmdb_api_fallback(self):
+        """
+        Test runs where Shoko links a TMDb ID but not its data, forcing a fallback to the
+        TMDb API, one subtest per media type.
+        """
+        fallbacks = [
+            {
+                'media': 'movie',
+                # Shoko API response *without* full movie data, forcing a TMDb call
+                'file_details': _file_details('movies/movie_fallback.mkv', show_id=None),
+                'episode_details': _episode_details('Movie Title', 'Movie', tmdb_ids={'Movie': [98765]}, tmdb={}),
+                'tmdb_returns': {'get_movie_details': {'title': 'Movie Title from API', 'release_date': '2025-01-01'}},
+                'tmdb_calls': {'get_movie_details': (98765,)},
+                'log': "Shoko did not provide full data. Querying TMDb API as a fallback...",
+                'expected': _EXPECTED['movie_api_fallback'],
+            },
+            {
+                'media': 'tv',
+                # Shoko API response with a TMDb Episode ID but no detailed episode data
+                'file_details': _file_details('series/tv_fallback.mkv'),
+                'episode_details': _episode_details('Some Episode', tmdb_ids={'Episode': [789]}, tmdb={}),
+                'tmdb_returns': {
+                    'get_series_details': _series_details(seasons=[{'season_number': 1, 'name': 'Season 1'}]),
+                    'get_season_details': [{'id': 789, 'name': 'Episode from API', 'season_number': 1, 'episode_number': 5}],
+                },
+                'tmdb_calls': {'get_series_details': (999,), 'get_season_details': (999, 1)},
+                'log': "Shoko did not provide full data. Searching TMDb seasons as a fallback...",
+                'expected': _EXPECTED['tv_api_fallback'],
             },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-
-        shoko_client.get_all_file_ids.return_value = []
-        db_manager.get_stale_entries.return_value = [
-            {'shoko_file_id': 999, 'destination_path': '/dest/shows/Stale Show/S01/stale.mkv'}
         ]
-        shoko_client.check_connection.return_value = True
-
-        # --- Act & Assert Logs ---
-        with self.assertLogs('root', level='WARNING') as cm:
-            bridge = ShokoBridge(mock_args, mock_config)
-            bridge.run()
-            self.assertIn("DRY RUN MODE ENABLED: No files or database entries will be deleted.", cm.output[0])
-
-        # --- Assert ---
-        # Verify that NO destructive actions were taken due to dry_run=True
-        file_manager.cleanup_stale_files.assert_not_called()
-        db_manager.remove_stale_entry.assert_not_called()
-        file_manager.cleanup_empty_dirs.assert_not_called()
-
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_add_update_dry_run(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                    mock_db_manager, mock_file_manager,
-                                    mock_shoko_client, mock_tmdb_client):
+        mock_args = _args()
+        mock_config = _config(destination_movies='/dest/movies')
+
+        db_manager = self._db_manager
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
+        tmdb_client = self._tmdb_client
+
+        for fallback in fallbacks:
+            with self.subTest(media=fallback['media']):
+                # --- Arrange ---
+                self._reset_mocks()
+                self._stub_new_files(123)
+
+                _stub_returns(
+                    shoko_client,
+                    get_file_details=fallback['file_details'],
+                    get_episode_details=fallback['episode_details'],
+                )
+                _stub_returns(tmdb_client, **fallback['tmdb_returns'])
+                file_manager.process_file_group.return_value = True
+
+                # --- Act & Assert Logs ---
+                bridge = ShokoBridge(mock_args, mock_config)
+                bridge.run()
+                logged = self._logged(logging.INFO)
+                self.assertTrue(any(fallback['log'] in message for message in logged))
+
+                # --- Assert ---
+                for method, args in fallback['tmdb_calls'].items():
+                    getattr(tmdb_client, method).assert_called_once_with(*args)
+                source, destination = fallback['expected']
+                file_manager.process_file_group.assert_called_once_with(source, destination, ANY)
+                db_manager.add_processed_file.assert_called_once_with(123, destination)
+
+    def test_run_with_supplemental_files(self):
         """
-        Test an add/update run in dry-run mode to ensure no DB changes are made.
+        Test that ShokoBridge correctly calls FileManager to process a media file
+        and its associated supplemental files (e.g., .srt, .ass).
         """
         # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = True # Enable dry run
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
+        mock_args = _args()
 
-        # Mock API responses for a single TV show file
-        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'series/episode.mkv'}], 'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [999]}}, 'EpisodeIDs': [{'ID': 456}]}] }
-        shoko_client.get_episode_details.return_value = { 'Name': 'Episode Title', 'AniDB': {'Type': 'Normal'}, 'IDs': {'TMDB': {'Episode': [789]}}, 'TMDB': {'Episodes': [{'ID': 789, 'Title': 'Episode Title', 'SeasonNumber': 1, 'EpisodeNumber': 1}]} }
-        tmdb_client.get_series_details.return_value = { 'name': 'Series Title', 'first_air_date': '2023-01-01' }
+        mock_config = _config()
 
-        # --- Act & Assert Logs ---
-        with self.assertLogs('root', level='WARNING') as cm:
-            bridge = ShokoBridge(mock_args, mock_config)
-            bridge.run()
-            self.assertIn("DRY RUN MODE ENABLED: No changes will be made", cm.output[0])
-
-        # --- Assert ---
-        # Verify that file processing logic was called (FileManager handles the dry run logging)
-        file_manager.process_file_group.assert_called_once()
-        # Verify that NO database write occurred due to dry_run=True
-        db_manager.add_processed_file.assert_not_called()
+        db_manager = self._db_manager
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
+        tmdb_client = self._tmdb_client
 
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_extra_file_trailer(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                     mock_db_manager, mock_file_manager,
-                                     mock_shoko_client, mock_tmdb_client):
-        """
-        Test a run with a file identified as a 'Trailer' extra.
-        """
-        # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
+        self._stub_new_files(1499) # Using an ID from the log
 
-        # Mock API responses for a file that is a TRAILER
-        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'series/trailer.mkv'}], 'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [999]}}, 'EpisodeIDs': [{'ID': 456}]}] }
-        shoko_client.get_episode_details.return_value = { 'Name': 'Awesome Trailer', 'AniDB': {'Type': 'Trailer'}, 'IDs': {'TMDB': {}} }
-        tmdb_client.get_series_details.return_value = { 'name': 'Series Title', 'first_air_date': '2023-01-01', 'seasons': [] }
+        # Mock API responses for a One Piece episode
+        _stub_returns(
+            shoko_client,
+            get_file_details=_file_details('One Piece/One Piece - 1107 [9A4CD29B].mkv', show_id=37854, episode_id=3645),
+            get_episode_details=_linked_tv_episode('A Shudder! The Evil Hand Creeping Up on the Laboratory', 22, 1107, tmdb_id=5343000),
+        )
+        tmdb_client.get_series_details.return_value = _series_details('One Piece', '1999-10-20')
         file_manager.process_file_group.return_value = True
 
         # --- Act ---
@@ -534,698 +581,321 @@ class TestShokoBridge(unittest.TestCase):
         bridge.run()
 
         # --- Assert ---
-        # Verify the path construction for an extra placed in the 'Trailers' folder
-        expected_dest_path = '/dest/shows/Series Title (2023)/Trailers/Awesome Trailer.mkv'
-        file_manager.process_file_group.assert_called_once_with('/source/series/trailer.mkv', expected_dest_path, ANY)
-        db_manager.add_processed_file.assert_called_once_with(123, expected_dest_path)
-
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_skip_processed_file(self, mock_isdir, mock_get_ip,
-                                     mock_db_manager, mock_file_manager,
-                                     mock_shoko_client, mock_tmdb_client):
+        # The core of this test is to ensure ShokoBridge passes the correct paths to FileManager.
+        # FileManager is then responsible for finding and handling the supplemental files.
+        source, destination = _EXPECTED['supplemental']
+        file_manager.process_file_group.assert_called_once_with(source, destination, ANY)
+        db_manager.add_processed_file.assert_called_once_with(1499, destination)
+
+    def test_run_movie_file_no_movie_destination(self):
         """
-        Test a run where a file is already in the database and should be skipped.
+        Test a movie is placed in the main destination folder when destination_movies is not set.
         """
         # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
+        mock_args = _args()
 
-        # Simulate the file ID is already in the database
-        shoko_client.get_all_file_ids.return_value = [123]
-        db_manager.get_processed_file_ids.return_value = {123}
-        shoko_client.check_connection.return_value = True
+        # Mock config *without* a separate movie destination, using a generic name to make the test clear
+        mock_config = _config(destination='/dest/media')
+
+        db_manager = self._db_manager
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
+
+        self._stub_new_files(123)
+
+        # Mock API responses for a MOVIE
+        _stub_returns(
+            shoko_client,
+            get_file_details=_file_details('movies/movie.mkv', show_id=None),
+            get_episode_details=_linked_movie('Movie Title from TMDb', '2024-01-01'),
+        )
+        file_manager.process_file_group.return_value = True
 
         # --- Act ---
         bridge = ShokoBridge(mock_args, mock_config)
         bridge.run()
 
         # --- Assert ---
-        # Verify that no processing calls were made for the file
-        shoko_client.get_file_details.assert_not_called()
-        file_manager.process_file_group.assert_not_called()
-        db_manager.add_processed_file.assert_not_called()
+        # Verify the destination path is based on the main 'destination' directory
+        source, destination = _EXPECTED['movie_main_destination']
+        file_manager.process_file_group.assert_called_once_with(source, destination, ANY)
+        db_manager.add_processed_file.assert_called_once_with(123, destination)
 
-    @patch('shokobridge.bridge.open', new_callable=unittest.mock.mock_open)
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_file_with_no_series(self, mock_isdir, mock_get_ip,
-                                     mock_db_manager, mock_file_manager,
-                                     mock_shoko_client, mock_tmdb_client, mock_open):
+class TestShokoBridgeUnmatched(_BridgeTestCase):
+    """Runs where a file is skipped and written to the unmatched report."""
+
+    def test_run_unmatched_file(self):
         """
-        Test a run where a file is not linked to any series in Shoko.
+        Test a run where a file cannot be matched and is added to the report.
         """
         # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
-        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'unlinked/file.mkv'}], 'SeriesIDs': [] }
+        mock_args = _args()
 
-        # --- Act & Assert Logs ---
-        with self.assertLogs('root', level='WARNING') as cm:
-            bridge = ShokoBridge(mock_args, mock_config)
-            bridge.run()
-            self.assertIn("File is not linked to any series in Shoko. Skipping.", cm.output[0])
+        mock_config = _config()
 
-        # --- Assert ---
-        shoko_client.get_episode_details.assert_not_called()
-        file_manager.process_file_group.assert_not_called()
-        handle = mock_open()
-        handle.write.assert_any_call("File: 'file.mkv' | ID: 123 | Reason: File is not linked to any series in Shoko. Skipping.\n")
-
-    @patch('shokobridge.bridge.open', new_callable=unittest.mock.mock_open)
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_file_with_no_episodes(self, mock_isdir, mock_get_ip,
-                                       mock_db_manager, mock_file_manager,
-                                       mock_shoko_client, mock_tmdb_client, mock_open):
-        """
-        Test a run where a file is linked to a series but has no episode IDs.
-        """
-        # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
-        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'series/no_ep_link.mkv'}], 'SeriesIDs': [{'EpisodeIDs': []}] }
+        db_manager = self._db_manager
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
+        tmdb_client = self._tmdb_client
 
-        # --- Act & Assert Logs ---
-        with self.assertLogs('root', level='WARNING') as cm:
-            bridge = ShokoBridge(mock_args, mock_config)
-            bridge.run()
-            self.assertIn("File is not linked to any episodes in Shoko. Skipping.", cm.output[0])
+        self._stub_new_files(123)
 
-        # --- Assert ---
-        handle = mock_open()
-        handle.write.assert_any_call("File: 'no_ep_link.mkv' | ID: 123 | Reason: File is not linked to any episodes in Shoko. Skipping.\n")
-
-    @patch('shokobridge.bridge.open', new_callable=unittest.mock.mock_open)
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_file_with_no_tmdb_series_id(self, mock_isdir, mock_get_ip,
-                                             mock_db_manager, mock_file_manager,
-                                             mock_shoko_client, mock_tmdb_client, mock_open):
-        """
-        Test a run where a file has a series link but no TMDb Show ID.
-        """
-        # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        file_manager = mock_file_manager.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
-        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'series/no_tmdb_id.mkv'}], 'SeriesIDs': [{'SeriesID': {'TMDB': {}}, 'EpisodeIDs': [{'ID': 456}]}] }
-        shoko_client.get_episode_details.return_value = { 'Name': 'Some Episode', 'AniDB': {'Type': 'Normal'}, 'IDs': {'TMDB': {}} }
+        # Mock API responses for a file that CANNOT be matched: no TMDb episode ID,
+        # forcing a title match which will fail
+        _stub_returns(
+            shoko_client,
+            get_file_details=_file_details('series/unmatched_episode.mkv'),
+            get_episode_details=_episode_details('A Very Unique Title That Will Not Match'),
+        )
+        tmdb_client.get_series_details.return_value = _series_details(seasons=[])
 
         # --- Act & Assert Logs ---
-        with self.assertLogs('root', level='WARNING') as cm:
-            bridge = ShokoBridge(mock_args, mock_config)
-            bridge.run()
-            self.assertIn("Could not find a TMDb Show ID link in Shoko's cross-reference data", cm.output[0])
-            self.assertIn("Could not determine destination path or filename", cm.output[1])
+        # The captured warnings are verified in the order they were logged
+        bridge = ShokoBridge(mock_args, mock_config)
+        bridge.run()
+        self._assert_logged_in_order(
+            logging.WARNING,
+            "No TMDb Episode ID link found for a 'Normal' episode",
+            "Could not determine destination path or filename",
+        )
 
         # --- Assert ---
+        # Verify that the file was not processed or added to the DB
         file_manager.process_file_group.assert_not_called()
-        handle = mock_open()
-        handle.write.assert_any_call("File: 'no_tmdb_id.mkv' | ID: 123 | Reason: Could not determine destination path or filename. Skipping.\n")
-
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_file_with_no_tmdb_episode_id_fallback_success(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                                               mock_db_manager, mock_file_manager,
-                                                               mock_shoko_client, mock_tmdb_client):
-        """
-        Test a run where an episode has no TMDb ID, but successfully matches by title.
-        """
-        # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
-
-        # Mock API responses for a file with no TMDb Episode ID
-        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'series/fallback_ep.mkv'}], 'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [999]}}, 'EpisodeIDs': [{'ID': 456}]}] }
-        shoko_client.get_episode_details.return_value = { 'Name': 'The Great Fallback Episode', 'AniDB': {'Type': 'Normal'}, 'IDs': {'TMDB': {}} }
-        tmdb_client.get_series_details.return_value = { 'name': 'Series Title', 'first_air_date': '2023-01-01', 'seasons': [{'season_number': 1, 'name': 'Season 1'}] }
-        tmdb_client.get_season_details.return_value = [ {'id': 789, 'name': 'The Great Fallback Episode', 'season_number': 1, 'episode_number': 5} ]
-        file_manager.process_file_group.return_value = True
+        db_manager.add_processed_file.assert_not_called()
 
-        # --- Act & Assert Logs ---
-        with self.assertLogs('root', level='INFO') as cm:
-            bridge = ShokoBridge(mock_args, mock_config)
-            bridge.run()
-            # cm.output[0] is "--- Starting ADD/UPDATE Run ---"
-            # cm.output[1] is "Found 1 new files to process."
-            self.assertIn("No TMDb Episode ID link found for a 'Normal' episode. Attempting fallback match by title...", cm.output[2])
-            self.assertIn("SUCCESS (Fallback Match): Matched to S1E5 with similarity 1.00!", cm.output[3])
+        # Verify that the unmatched report was written to
+        self._report_open.assert_called_once_with('report.txt', 'w', encoding='utf-8')
+        self.assertIn("File: 'unmatched_episode.mkv' | ID: 123 | Reason: Could not determine destination path or filename. Skipping.\n", self._report.lines())
 
-        # --- Assert ---
-        tmdb_client.get_season_details.assert_called_once_with(999, 1)
-        expected_dest_path = '/dest/shows/Series Title (2023)/Season 01/Series Title (2023) - S01E05 - The Great Fallback Episode.mkv'
-        file_manager.process_file_group.assert_called_once_with('/source/series/fallback_ep.mkv', expected_dest_path, ANY)
-        db_manager.add_processed_file.assert_called_once_with(123, expected_dest_path)
-
-    @patch('shokobridge.bridge.open', new_callable=unittest.mock.mock_open)
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_file_with_no_tmdb_episode_id_fallback_fail(self, mock_isdir, mock_get_ip,
-                                                            mock_db_manager, mock_file_manager,
-                                                            mock_shoko_client, mock_tmdb_client, mock_open):
+    def test_run_file_with_no_series(self):
         """
-        Test a run where an episode has no TMDb ID and the title match fallback fails.
+        Test a run where a file is not linked to any series in Shoko.
         """
         # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
+        mock_args = _args()
 
-        # Mock API responses for a file with no TMDb Episode ID and a non-matching title
-        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'series/fallback_fail.mkv'}], 'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [999]}}, 'EpisodeIDs': [{'ID': 456}]}] }
-        shoko_client.get_episode_details.return_value = { 'Name': 'The Great Fallback Episode', 'AniDB': {'Type': 'Normal'}, 'IDs': {'TMDB': {}} }
-        tmdb_client.get_series_details.return_value = { 'name': 'Series Title', 'first_air_date': '2023-01-01', 'seasons': [{'season_number': 1, 'name': 'Season 1'}] }
-        # The TMDb title is completely different, so similarity will be low
-        tmdb_client.get_season_details.return_value = [ {'id': 789, 'name': 'A Completely Different Title', 'season_number': 1, 'episode_number': 5} ]
+        mock_config = _config()
 
-        # --- Act & Assert Logs ---
-        with self.assertLogs('root', level='WARNING') as cm:
-            bridge = ShokoBridge(mock_args, mock_config)
-            bridge.run()
-            self.assertIn("No TMDb Episode ID link found for a 'Normal' episode. Attempting fallback match by title...", cm.output[0])
-            self.assertIn("Could not determine destination path or filename", cm.output[1])
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
 
-        # --- Assert ---
-        file_manager.process_file_group.assert_not_called()
-        db_manager.add_processed_file.assert_not_called()
-        handle = mock_open()
-        handle.write.assert_any_call("File: 'fallback_fail.mkv' | ID: 123 | Reason: Could not determine destination path or filename. Skipping.\n")
-
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_movie_file_tmdb_api_fallback(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                              mock_db_manager, mock_file_manager,
-                                              mock_shoko_client, mock_tmdb_client):
-        """
-        Test a run where a movie file forces a fallback to the TMDb API.
-        """
-        # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows', 'destination_movies': '/dest/movies' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
-
-        # Mock Shoko API response *without* full movie data, forcing a TMDb call
-        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'movies/movie_fallback.mkv'}], 'SeriesIDs': [{'EpisodeIDs': [{'ID': 456}]}] }
-        shoko_client.get_episode_details.return_value = { 'Name': 'Movie Title', 'AniDB': {'Type': 'Movie'}, 'IDs': {'TMDB': {'Movie': [98765]}}, 'TMDB': {} }
-        tmdb_client.get_movie_details.return_value = { 'title': 'Movie Title from API', 'release_date': '2025-01-01' }
-        file_manager.process_file_group.return_value = True
+        self._stub_new_files(123)
+        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'unlinked/file.mkv'}], 'SeriesIDs': [] }
 
         # --- Act & Assert Logs ---
-        with self.assertLogs('root', level='INFO') as cm:
-            bridge = ShokoBridge(mock_args, mock_config)
-            bridge.run()
-            self.assertIn("Shoko did not provide full data. Querying TMDb API as a fallback...", cm.output[3])
-
-        # --- Assert ---
-        tmdb_client.get_movie_details.assert_called_once_with(98765)
-        expected_dest_path = '/dest/movies/Movie Title from API (2025)/Movie Title from API (2025).mkv'
-        file_manager.process_file_group.assert_called_once_with('/source/movies/movie_fallback.mkv', expected_dest_path, ANY)
-        db_manager.add_processed_file.assert_called_once_with(123, expected_dest_path)
-
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_tv_episode_tmdb_api_fallback(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                              mock_db_manager, mock_file_manager,
-                                              mock_shoko_client, mock_tmdb_client):
-        """
-        Test a run where a TV episode forces a fallback to the TMDb API for season details.
-        """
-        # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
-
-        # Mock Shoko API response with a TMDb Episode ID but no detailed episode data
-        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'series/tv_fallback.mkv'}], 'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [999]}}, 'EpisodeIDs': [{'ID': 456}]}] }
-        shoko_client.get_episode_details.return_value = { 'Name': 'Some Episode', 'AniDB': {'Type': 'Normal'}, 'IDs': {'TMDB': {'Episode': [789]}}, 'TMDB': {} }
-        tmdb_client.get_series_details.return_value = { 'name': 'Series Title', 'first_air_date': '2023-01-01', 'seasons': [{'season_number': 1, 'name': 'Season 1'}] }
-        tmdb_client.get_season_details.return_value = [ {'id': 789, 'name': 'Episode from API', 'season_number': 1, 'episode_number': 5} ]
-        file_manager.process_file_group.return_value = True
-
-        # --- Act ---
         bridge = ShokoBridge(mock_args, mock_config)
         bridge.run()
+        logged = self._logged(logging.WARNING)
+        self.assertIn("File is not linked to any series in Shoko. Skipping.", logged[0])
 
         # --- Assert ---
-        tmdb_client.get_series_details.assert_called_once_with(999)
-        tmdb_client.get_season_details.assert_called_once_with(999, 1)
-        expected_dest_path = '/dest/shows/Series Title (2023)/Season 01/Series Title (2023) - S01E05 - Episode from API.mkv'
-        file_manager.process_file_group.assert_called_once_with('/source/series/tv_fallback.mkv', expected_dest_path, ANY)
-        db_manager.add_processed_file.assert_called_once_with(123, expected_dest_path)
-
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_with_supplemental_files(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                         mock_db_manager, mock_file_manager,
-                                         mock_shoko_client, mock_tmdb_client):
+        shoko_client.get_episode_details.assert_not_called()
+        file_manager.process_file_group.assert_not_called()
+        self.assertIn("File: 'file.mkv' | ID: 123 | Reason: File is not linked to any series in Shoko. Skipping.\n", self._report.lines())
+
+    def test_run_file_with_no_episodes(self):
         """
-        Test that ShokoBridge correctly calls FileManager to process a media file
-        and its associated supplemental files (e.g., .srt, .ass).
+        Test a run where a file is linked to a series but has no episode IDs.
         """
         # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [1499] # Using an ID from the log
-        shoko_client.check_connection.return_value = True
+        mock_args = _args()
 
-        # Mock API responses for a One Piece episode
-        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'One Piece/One Piece - 1107 [9A4CD29B].mkv'}], 'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [37854]}}, 'EpisodeIDs': [{'ID': 3645}]}] }
-        shoko_client.get_episode_details.return_value = { 'Name': 'A Shudder! The Evil Hand Creeping Up on the Laboratory', 'AniDB': {'Type': 'Normal'}, 'IDs': {'TMDB': {'Episode': [5343000]}}, 'TMDB': {'Episodes': [{'ID': 5343000, 'Title': 'A Shudder! The Evil Hand Creeping Up on the Laboratory', 'SeasonNumber': 22, 'EpisodeNumber': 1107}]} }
-        tmdb_client.get_series_details.return_value = { 'name': 'One Piece', 'first_air_date': '1999-10-20' }
-        file_manager.process_file_group.return_value = True
+        mock_config = _config()
 
-        # --- Act ---
-        bridge = ShokoBridge(mock_args, mock_config)
-        bridge.run()
+        shoko_client = self._shoko_client
 
-        # --- Assert ---
-        # The core of this test is to ensure ShokoBridge passes the correct paths to FileManager.
-        # FileManager is then responsible for finding and handling the supplemental files.
-        expected_source_path = '/source/One Piece/One Piece - 1107 [9A4CD29B].mkv'
-        expected_dest_path = '/dest/shows/One Piece (1999)/Season 22/One Piece (1999) - S22E1107 - A Shudder! The Evil Hand Creeping Up on the Laboratory.mkv'
-        file_manager.process_file_group.assert_called_once_with(expected_source_path, expected_dest_path, ANY)
-        db_manager.add_processed_file.assert_called_once_with(1499, expected_dest_path)
-
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_movie_file_no_movie_destination(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                                 mock_db_manager, mock_file_manager,
-                                                 mock_shoko_client, mock_tmdb_client):
-        """
-        Test a movie is placed in the main destination folder when destination_movies is not set.
-        """
-        # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        # Mock config *without* a separate movie destination
-        mock_config = {
-            'directories': {
-                'source_root': '/source',
-                'destination': '/dest/media', # Using a generic name to make the test clear
-            },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
-
-        # Mock API responses for a MOVIE
-        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'movies/movie.mkv'}], 'SeriesIDs': [{'EpisodeIDs': [{'ID': 456}]}] }
-        shoko_client.get_episode_details.return_value = { 'Name': 'Movie Title', 'AniDB': {'Type': 'Movie'}, 'IDs': {'TMDB': {'Movie': [98765]}}, 'TMDB': {'Movies': [{'ID': 98765, 'Title': 'Movie Title from TMDb', 'ReleasedAt': '2024-01-01'}]} }
-        file_manager.process_file_group.return_value = True
+        self._stub_new_files(123)
+        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'series/no_ep_link.mkv'}], 'SeriesIDs': [{'EpisodeIDs': []}] }
 
-        # --- Act ---
+        # --- Act & Assert Logs ---
         bridge = ShokoBridge(mock_args, mock_config)
         bridge.run()
+        logged = self._logged(logging.WARNING)
+        self.assertIn("File is not linked to any episodes in Shoko. Skipping.", logged[0])
 
         # --- Assert ---
-        # Verify the destination path is based on the main 'destination' directory
-        expected_dest_path = '/dest/media/Movie Title from TMDb (2024)/Movie Title from TMDb (2024).mkv'
-        file_manager.process_file_group.assert_called_once_with('/source/movies/movie.mkv', expected_dest_path, ANY)
-        db_manager.add_processed_file.assert_called_once_with(123, expected_dest_path)
-
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_extra_file_other(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                  mock_db_manager, mock_file_manager,
-                                  mock_shoko_client, mock_tmdb_client):
+        self.assertIn("File: 'no_ep_link.mkv' | ID: 123 | Reason: File is not linked to any episodes in Shoko. Skipping.\n", self._report.lines())
+
+    def test_run_file_with_no_tmdb_series_id(self):
         """
-        Test a run with a file identified as an 'Other' type extra.
+        Test a run where a file has a series link but no TMDb Show ID.
         """
         # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [123]
-        shoko_client.check_connection.return_value = True
+        mock_args = _args()
 
-        shoko_client.get_file_details.return_value = { 'Locations': [{'RelativePath': 'series/other_extra.mkv'}], 'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [999]}}, 'EpisodeIDs': [{'ID': 456}]}] }
-        shoko_client.get_episode_details.return_value = { 'Name': 'My Other Extra', 'AniDB': {'Type': 'Other'}, 'IDs': {'TMDB': {}} }
-        tmdb_client.get_series_details.return_value = { 'name': 'Series Title', 'first_air_date': '2023-01-01', 'seasons': [] }
-        file_manager.process_file_group.return_value = True
+        mock_config = _config()
 
-        # --- Act ---
+        shoko_client = self._shoko_client
+        file_manager = self._file_manager
+
+        self._stub_new_files(123)
+        _stub_returns(
+            shoko_client,
+            get_file_details={ 'Locations': [{'RelativePath': 'series/no_tmdb_id.mkv'}], 'SeriesIDs': [{'SeriesID': {'TMDB': {}}, 'EpisodeIDs': [{'ID': 456}]}] },
+            get_episode_details=_episode_details('Some Episode'),
+        )
+
+        # --- Act & Assert Logs ---
         bridge = ShokoBridge(mock_args, mock_config)
         bridge.run()
+        self._assert_logged_in_order(
+            logging.WARNING,
+            "Could not find a TMDb Show ID link in Shoko's cross-reference data",
+            "Could not determine destination path or filename",
+        )
 
         # --- Assert ---
-        expected_dest_path = '/dest/shows/Series Title (2023)/Other/My Other Extra.mkv'
-        file_manager.process_file_group.assert_called_once_with('/source/series/other_extra.mkv', expected_dest_path, ANY)
-        db_manager.add_processed_file.assert_called_once_with(123, expected_dest_path)
-
-    @patch('shokobridge.bridge.open', new_callable=unittest.mock.mock_open)
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_shoko_api_error_graceful_handling(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                                   mock_db_manager, mock_file_manager,
-                                                   mock_shoko_client, mock_tmdb_client, mock_open):
+        file_manager.process_file_group.assert_not_called()
+        self.assertIn("File: 'no_tmdb_id.mkv' | ID: 123 | Reason: Could not determine destination path or filename. Skipping.\n", self._report.lines())
+
+    def test_run_file_with_no_tmdb_episode_id_fallback_fail(self):
         """
-        Test that the script handles an unexpected Shoko API error gracefully and continues.
+        Test a run where an episode has no TMDb ID and the title match fallback fails.
         """
         # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [101, 102]
-        shoko_client.check_connection.return_value = True
+        mock_args = _args()
 
-        shoko_client.get_file_details.side_effect = [ Exception("Shoko API is down!"), { 'Locations': [{'RelativePath': 'series/episode.mkv'}], 'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [999]}}, 'EpisodeIDs': [{'ID': 456}]}] } ]
-        shoko_client.get_episode_details.return_value = { 'Name': 'Episode Title', 'AniDB': {'Type': 'Normal'}, 'IDs': {'TMDB': {'Episode': [789]}}, 'TMDB': {'Episodes': [{'ID': 789, 'Title': 'Episode Title', 'SeasonNumber': 1, 'EpisodeNumber': 1}]} }
-        tmdb_client.get_series_details.return_value = { 'name': 'Series Title', 'first_air_date': '2023-01-01' }
-        file_manager.process_file_group.return_value = True
+        mock_config = _config()
 
-        # --- Act & Assert Logs ---
-        with self.assertLogs('root', level='ERROR') as cm:
-            bridge = ShokoBridge(mock_args, mock_config)
-            bridge.run()
-            self.assertIn("An unexpected error occurred processing file ID 101: Shoko API is down!", cm.output[0])
+        db_manager = self._db_manager
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
+        tmdb_client = self._tmdb_client
 
-        # --- Assert ---
-        file_manager.process_file_group.assert_called_once()
-        expected_dest_path = '/dest/shows/Series Title (2023)/Season 01/Series Title (2023) - S01E01 - Episode Title.mkv'
-        db_manager.add_processed_file.assert_called_once_with(102, expected_dest_path)
-        handle = mock_open()
-        handle.write.assert_any_call("File ID: 101 | Reason: Unexpected script error - Shoko API is down!\n")
-
-    @patch('shokobridge.bridge.open', new_callable=unittest.mock.mock_open)
-    @patch('shokobridge.bridge.TMDbClient')
-    @patch('shokobridge.bridge.ShokoClient')
-    @patch('shokobridge.bridge.FileManager')
-    @patch('shokobridge.bridge.DatabaseManager')
-    @patch('shokobridge.bridge.ShokoBridge._clean_filename', side_effect=lambda x: x)
-    @patch('shokobridge.bridge.get_windows_host_ip', return_value='127.0.0.1')
-    @patch('shokobridge.bridge.os.path.isdir', return_value=True)
-    def test_run_tmdb_api_error_graceful_handling(self, mock_isdir, mock_get_ip, mock_clean_filename,
-                                                  mock_db_manager, mock_file_manager,
-                                                  mock_shoko_client, mock_tmdb_client, mock_open):
-        """
-        Test that the script handles a TMDb API error gracefully and continues.
-        """
-        # --- Arrange ---
-        mock_args = MagicMock()
-        mock_args.cleanup = False
-        mock_args.dry_run = False
-        mock_args.debug = False
-
-        mock_config = {
-            'directories': { 'source_root': '/source', 'destination': '/dest/shows' },
-            'shoko': {'url': 'http://test.host:8111', 'api_key': 'test_key'},
-            'tmdb': {'api_key': 'test_key'},
-            'path_mappings': [],
-            'options': { 'title_similarity_threshold': 0.85, 'link_type': 'symlink', 'use_relative_symlinks': False },
-            'paths': { 'db': 'test.db', 'cache': 'cache.json', 'unmatched_report': 'report.txt' }
-        }
-
-        db_manager = mock_db_manager.return_value
-        file_manager = mock_file_manager.return_value
-        shoko_client = mock_shoko_client.return_value
-        tmdb_client = mock_tmdb_client.return_value
-
-        db_manager.get_processed_file_ids.return_value = set()
-        shoko_client.get_all_file_ids.return_value = [201, 202]
-        shoko_client.check_connection.return_value = True
+        self._stub_new_files(123)
 
-        shoko_client.get_file_details.side_effect = [ { 'Locations': [{'RelativePath': 'series/failed_ep.mkv'}], 'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [888]}}, 'EpisodeIDs': [{'ID': 456}]}] }, { 'Locations': [{'RelativePath': 'series/success_ep.mkv'}], 'SeriesIDs': [{'SeriesID': {'TMDB': {'Show': [999]}}, 'EpisodeIDs': [{'ID': 789}]}] } ]
-        shoko_client.get_episode_details.side_effect = [ { 'Name': 'Failed Episode', 'AniDB': {'Type': 'Normal'}, 'IDs': {'TMDB': {}} }, { 'Name': 'Successful Episode', 'AniDB': {'Type': 'Normal'}, 'IDs': {'TMDB': {'Episode': [12345]}}, 'TMDB': {'Episodes': [{'ID': 12345, 'Title': 'Successful Episode', 'SeasonNumber': 1, 'EpisodeNumber': 2}]}} ]
-        tmdb_client.get_series_details.side_effect = [ None, { 'name': 'Successful Series', 'first_air_date': '2024-01-01' } ]
-        file_manager.process_file_group.return_value = True
+        # Mock API responses for a file with no TMDb Episode ID and a non-matching title
+        _stub_returns(
+            shoko_client,
+            get_file_details=_file_details('series/fallback_fail.mkv'),
+            get_episode_details=_episode_details('The Great Fallback Episode'),
+        )
+        # The TMDb title is completely different, so similarity will be low
+        _stub_returns(
+            tmdb_client,
+            get_series_details=_series_details(seasons=[{'season_number': 1, 'name': 'Season 1'}]),
+            get_season_details=[ {'id': 789, 'name': 'A Completely Different Title', 'season_number': 1, 'episode_number': 5} ],
+        )
 
         # --- Act & Assert Logs ---
-        with self.assertLogs('root', level='WARNING') as cm:
-            bridge = ShokoBridge(mock_args, mock_config)
-            bridge.run()
-            self.assertIn("Cannot process because TMDb series data could not be fetched for show ID 888.", cm.output[0])
+        bridge = ShokoBridge(mock_args, mock_config)
+        bridge.run()
+        self._assert_logged_in_order(
+            logging.WARNING,
+            "No TMDb Episode ID link found for a 'Normal' episode. Attempting fallback match by title...",
+            "Could not determine destination path or filename",
+        )
 
         # --- Assert ---
-        file_manager.process_file_group.assert_called_once()
-        expected_dest_path = '/dest/shows/Successful Series (2024)/Season 01/Successful Series (2024) - S01E02 - Successful Episode.mkv'
-        db_manager.add_processed_file.assert_called_once_with(202, expected_dest_path)
-        handle = mock_open()
-        handle.write.assert_any_call("File: 'failed_ep.mkv' | ID: 201 | Reason: Could not determine destination path or filename. Skipping.\n")
\ No newline at end of file
+        file_manager.process_file_group.assert_not_called()
+        db_manager.add_processed_file.assert_not_called()
+        self.assertIn("File: 'fallback_fail.mkv' | ID: 123 | Reason: Could not determine destination path or filename. Skipping.\n", self._report.lines())
+
+    def test_run_api_error_graceful_handling(self):
+        """
+        Test that the script handles an API error on the first file gracefully and continues
+        with the next one, one subtest per failing API.
+        """
+        errors = [
+            {
+                # An unexpected Shoko API error is logged as an error and reported by file ID
+                'api': 'shoko',
+                'file_ids': (101, 102),
+                'file_details': (Exception("Shoko API is down!"), _SHOKO_DOWN_LINKED_FILE_DETAILS),
+                'episode_details': _SHOKO_DOWN_EPISODE_DETAILS,
+                'series_details': _SHOKO_DOWN_SERIES_DETAILS,
+                'log_level': logging.ERROR,
+                'log': "An unexpected error occurred processing file ID 101: Shoko API is down!",
+                'report_line': "File ID: 101 | Reason: Unexpected script error - Shoko API is down!\n",
+                'expected': _EXPECTED['tv_episode'],
+            },
+            {
+                # Missing TMDb series data leaves the file unmatched with a warning
+                'api': 'tmdb',
+                'file_ids': (201, 202),
+                'file_details': _TMDB_DOWN_FILE_DETAILS,
+                'episode_details': _TMDB_DOWN_EPISODE_DETAILS,
+                'series_details': _TMDB_DOWN_SERIES_DETAILS,
+                'log_level': logging.WARNING,
+                'log': "Cannot process because TMDb series data could not be fetched for show ID 888.",
+                'report_line': "File: 'failed_ep.mkv' | ID: 201 | Reason: Could not determine destination path or filename. Skipping.\n",
+                'expected': _EXPECTED['tmdb_error_recovery'],
+            },
+        ]
+        mock_args = _args()
+        mock_config = _config()
+
+        db_manager = self._db_manager
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
+        tmdb_client = self._tmdb_client
+
+        for error in errors:
+            with self.subTest(api=error['api']):
+                # --- Arrange ---
+                self._reset_mocks()
+                self._stub_new_files(*error['file_ids'])
+                shoko_client.get_file_details.side_effect = error['file_details']
+                shoko_client.get_episode_details.side_effect = error['episode_details']
+                tmdb_client.get_series_details.side_effect = error['series_details']
+                file_manager.process_file_group.return_value = True
+
+                # --- Act & Assert Logs ---
+                bridge = ShokoBridge(mock_args, mock_config)
+                bridge.run()
+                self.assertIn(error['log'], self._logged(error['log_level'])[0])
+
+                # --- Assert ---
+                # Only the second file gets linked and recorded
+                source, destination = error['expected']
+                file_manager.process_file_group.assert_called_once_with(source, destination, ANY)
+                db_manager.add_processed_file.assert_called_once_with(error['file_ids'][1], destination)
+                self.assertIn(error['report_line'], self._report.lines())
+
+class TestShokoBridgeCleanup(_BridgeTestCase):
+    """Cleanup runs that remove stale links."""
+
+    def test_run_cleanup_stale_files(self):
+        """
+        Test a cleanup run where one stale file is found, once normally (it is removed)
+        and once in dry-run mode (no destructive actions are taken).
+        """
+        db_manager = self._db_manager
+        file_manager = self._file_manager
+        shoko_client = self._shoko_client
+
+        for dry_run in (False, True):
+            with self.subTest(dry_run=dry_run):
+                # --- Arrange ---
+                self._reset_mocks()
+                mock_args = _args(cleanup=True, dry_run=dry_run)
+                mock_config = _config(destination_movies='/dest/movies')
+
+                # Shoko has no files, but our DB has one, making it stale.
+                shoko_client.get_all_file_ids.return_value = []
+                db_manager.get_stale_entries.return_value = [
+                    {'shoko_file_id': 999, 'destination_path': '/dest/shows/Stale Show/S01/stale.mkv'}
+                ]
+                shoko_client.check_connection.return_value = True
+
+                # --- Act ---
+                bridge = ShokoBridge(mock_args, mock_config)
+                bridge.run()
+                if dry_run:
+                    self.assertIn("DRY RUN MODE ENABLED: No files or database entries will be deleted.", self._logged(logging.WARNING)[0])
+
+                # --- Assert ---
+                shoko_client.check_connection.assert_called_once()
+                db_manager.get_stale_entries.assert_called_once_with([])
+                if dry_run:
+                    # Verify that NO destructive actions were taken
+                    file_manager.cleanup_stale_files.assert_not_called()
+                    db_manager.remove_stale_entry.assert_not_called()
+                    file_manager.cleanup_empty_dirs.assert_not_called()
+                else:
+                    file_manager.cleanup_stale_files.assert_called_once_with('/dest/shows/Stale Show/S01/stale.mkv')
+                    db_manager.remove_stale_entry.assert_called_once_with(999)
+                    file_manager.cleanup_empty_dirs.assert_any_call('/dest/shows')
+                    file_manager.cleanup_empty_dirs.assert_any_call('/dest/movies')
+                    self.assertEqual(file_manager.cleanup_empty_dirs.call_count, 2)